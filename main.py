@@ -1,10 +1,18 @@
+import os
+import json
 import pytz
+import uuid
+import queue
+import atexit
 import logging
+import sqlite3
 import datetime
+import threading
+import numpy as np
 import pandas as pd
 import tkinter as tk
 
-from ib_insync import IB, Stock, util
+from ib_insync import IB, Stock
 from pandas.tseries.offsets import BDay 
 from tkinter import ttk, filedialog, messagebox
 
@@ -13,10 +21,30 @@ logger = logging.getLogger(__name__)
 
 eastern = pytz.timezone("US/Eastern")
 
-ib = IB()
-ib.connect('127.0.0.1', 7497, clientId=1)
+MARKET_CUTOFF = datetime.time(20, 0)
+SESSION_START = datetime.time(4, 0)
+WARMUP_DELAY = datetime.timedelta(minutes=15)
+WARMUP_STEP_MS = 50
+
+PROFILES_DIR = "profiles"
+MANUAL_PROFILE = "manual"
+CONDITION_IDS = range(1, 127)
+
+RATIO_THRESHOLDS = {124: 1.5, 125: 1.7, 126: 2.0}
+RATIO_LABELS = {124: "High [16h DAY-1 ; 19h DAY] > {} * Open 16h DAY-1",
+                125: "High [16h DAY-1 ; 19h DAY] > {} * Open 16h DAY-1",
+                126: "High [4h DAY ; 19h DAY] > {} * Close 19h DAY-1"}
+RATIO_REFERENCES = {124: "open16h", 125: "open16h", 126: "close19h"}
+SWEEP_THRESHOLDS = np.round(np.arange(1.0, 3.01, 0.1), 2)
+
+RESULTS_DB = "output/screener_results.db"
 
-logger.info("Connected to IB Gateway/TWS")
+EPOCH = datetime.datetime(1970, 1, 1)
+PRICE_SCALE = 10000
+MAX_PRICE = np.iinfo(np.int32).max / PRICE_SCALE
+BAR_DTYPE = np.dtype([("Hour", "<i4"), ("Open", "<i4"), ("High", "<i4"), ("Low", "<i4"), ("Close", "<i4")])
+
+ib = IB()
 
 def extract_comparator(condition_text):
 
@@ -38,6 +66,307 @@ def inverse_comparator(text):
     
     return text.translate(str.maketrans(inversions)) if any(k in text for k in inversions) else f"Inverse de ({text})"
 
+def epoch_hour(dt):
+
+    """
+    Hours since EPOCH on the US/Eastern wall clock. Naive datetimes are taken as UTC.
+    """
+
+    if dt.tzinfo is None:
+        dt = pytz.utc.localize(dt)
+
+    return int((dt.astimezone(eastern).replace(tzinfo=None) - EPOCH).total_seconds() // 3600)
+
+def hour_to_datetime(hour):
+
+    return EPOCH + datetime.timedelta(hours=int(hour))
+
+def session_day(date):
+
+    return (date - EPOCH.date()).days
+
+def day_bars(bars, date):
+
+    """
+    Return the bars of one session as a view (bars are sorted by Hour).
+    """
+
+    day = session_day(date)
+    hours = bars["Hour"]
+
+    return bars[np.searchsorted(hours, day * 24, "left"):np.searchsorted(hours, (day + 1) * 24, "left")]
+
+def session_dates(bars):
+
+    return [EPOCH.date() + datetime.timedelta(days=int(day)) for day in np.unique(bars["Hour"] // 24)]
+
+def hour_bars(bars, start_h, end_h):
+
+    hours = bars["Hour"] % 24
+    return bars[(hours >= start_h) & (hours <= end_h)]
+
+def to_price(value):
+
+    """
+    Decode a scaled-int price. The division is correctly rounded, so a price with up to
+    4 decimals comes back as the same float64 IB sent.
+    """
+
+    return float(value) / PRICE_SCALE
+
+def get_bar(bars, h):
+
+    idx = np.flatnonzero(bars["Hour"] % 24 == int(h))
+
+    if idx.size == 0:
+        return None
+
+    bar = bars[idx[-1]]
+
+    return {"Hour": int(bar["Hour"]), 
+            "Open": to_price(bar["Open"]), 
+            "High": to_price(bar["High"]), 
+            "Low": to_price(bar["Low"]), 
+            "Close": to_price(bar["Close"])}
+
+def get_range_high(bars, start_h, end_h):
+
+    rows = [get_bar(bars, h) for h in range(start_h, end_h + 1)]
+    highs = [bar["High"] for bar in rows if bar is not None]
+    return max(highs) if highs else None
+
+def get_range_low(bars, start_h, end_h):
+
+    rows = [get_bar(bars, h) for h in range(start_h, end_h + 1)]
+    lows = [bar["Low"] for bar in rows if bar is not None]
+    return min(lows) if lows else None
+
+def format_selection(selection):
+
+    return ",".join(f"inv_{cid}" if inv else str(cid) for cid, inv in sorted(selection.items()))
+
+def exceeds_ratio(max_highs, ref_prices, thresholds):
+
+    """
+    max high > k * reference price for every (sample, threshold) pair, in float64.
+    Used by both the ratio conditions and the threshold sweep.
+    """
+
+    max_highs = np.asarray(max_highs, dtype=np.float64).reshape(-1, 1)
+    ref_prices = np.asarray(ref_prices, dtype=np.float64).reshape(-1, 1)
+    thresholds = np.asarray(thresholds, dtype=np.float64).reshape(1, -1)
+
+    return max_highs > thresholds * ref_prices
+
+def sweep_ratio_thresholds(max_highs, ref_prices, thresholds):
+
+    """
+    Count, for every threshold k, the samples where max high > k * reference price.
+    All thresholds are evaluated in one broadcast (samples x thresholds).
+    """
+
+    return exceeds_ratio(max_highs, ref_prices, thresholds).sum(axis=0)
+
+class BarArena:
+
+    """
+    Bars of every ticker in one contiguous BAR_DTYPE array, with a (start, stop) offset per ticker.
+    Only the hour (see epoch_hour) and the OHLC read by the conditions are kept, 
+    as int32 prices scaled by PRICE_SCALE (see to_price).
+    """
+
+    def __init__(self, capacity=1024):
+
+        self.bars = np.empty(capacity, dtype=BAR_DTYPE)
+        self.size = 0
+        self.offsets = {}
+
+    def __contains__(self, ticker):
+
+        return ticker in self.offsets
+
+    def __getitem__(self, ticker):
+
+        start, stop = self.offsets[ticker]
+        return self.bars[start:stop]
+
+    def reserve(self, count):
+
+        if self.size + count <= len(self.bars):
+            return
+
+        capacity = len(self.bars)
+
+        while self.size + count > capacity:
+            capacity *= 2
+
+        bars = np.empty(capacity, dtype=BAR_DTYPE)
+        bars[:self.size] = self.bars[:self.size]
+        self.bars = bars
+
+    def add(self, ticker, bar_data):
+
+        """
+        Decode ib_insync BarData straight into the arena and return the ticker's slice.
+        A ticker already in the arena keeps its bars, prices out of the int32 range are rejected.
+        """
+
+        if ticker in self.offsets:
+            logger.warning(f"{ticker} is already loaded, keeping its first bars")
+            return self[ticker]
+
+        out_of_range = [price for bar in bar_data for price in (bar.open, bar.high, bar.low, bar.close) if not abs(price) <= MAX_PRICE]
+
+        if out_of_range:
+            logger.error(f"{ticker} has prices beyond the {MAX_PRICE:,.4f} limit of the bar arena ({out_of_range[0]}), skipping.")
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        count = len(bar_data)
+        self.reserve(count)
+
+        start, stop = self.size, self.size + count
+        self.bars[start:stop] = np.fromiter(((epoch_hour(bar.date), 
+                                              round(bar.open * PRICE_SCALE), 
+                                              round(bar.high * PRICE_SCALE), 
+                                              round(bar.low * PRICE_SCALE), 
+                                              round(bar.close * PRICE_SCALE)) for bar in bar_data), dtype=BAR_DTYPE, count=count)
+
+        self.offsets[ticker] = (start, stop)
+        self.size = stop
+
+        return self[ticker]
+
+class ResultsArchive:
+
+    """
+    Append-only SQLite store of every match, one row per (run, ticker, profile).
+    The screening loop only queues rows, a background thread writes them in batches.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            run_id TEXT NOT NULL,
+            screening_date TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            conditions TEXT NOT NULL,
+            thresholds TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            ticker_no INTEGER,
+            open_16h_day_minus1 REAL,
+            close_19h_day_minus1 REAL,
+            max_high_16h_day_minus1_to_19h_day REAL,
+            max_high_day REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_profile_date ON results (profile, screening_date, ticker);
+        CREATE INDEX IF NOT EXISTS idx_results_ticker_date ON results (ticker, screening_date);
+        CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id);
+    """
+
+    INSERT = "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path=RESULTS_DB, batch_size=500):
+
+        self.path = path
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.thread = None
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.executescript(self.SCHEMA)
+
+        except Exception as e:
+            logger.error(f"Results archive disabled, cannot open {path}: {e}")
+            return
+
+        self.thread = threading.Thread(target=self.writer, name="ResultsArchive", daemon=True)
+        self.thread.start()
+
+        atexit.register(self.close)
+
+    @property
+    def enabled(self):
+
+        return self.thread is not None and self.thread.is_alive()
+
+    def writer(self):
+
+        conn = self.conn
+        running = True
+
+        while running:
+
+            rows = [self.queue.get()]
+
+            while len(rows) < self.batch_size and rows[-1] is not None:
+
+                try:
+                    rows.append(self.queue.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            if rows[-1] is None:
+                running = False
+
+            batch = [row for row in rows if row is not None]
+
+            try:
+                conn.executemany(self.INSERT, batch)
+                conn.commit()
+
+            except Exception as e:
+                logger.error(f"Error archiving {len(batch)} results: {e}")
+
+            for _ in rows:
+                self.queue.task_done()
+
+        conn.close()
+
+    def record(self, run_id, screening_date, profile, selection, thresholds, ticker, ticker_no, open_16h=None, close_19h=None, max_high_16h_to_19h=None, max_high_day=None):
+
+        if not self.enabled:
+            return
+
+        to_float = lambda val: None if val is None else float(val)
+
+        self.queue.put((run_id, screening_date.isoformat(), profile, format_selection(selection),
+                        json.dumps({str(cid): val for cid, val in thresholds.items()}), ticker, ticker_no,
+                        to_float(open_16h), to_float(close_19h), to_float(max_high_16h_to_19h), to_float(max_high_day)))
+
+    def flush(self):
+
+        if self.enabled:
+            self.queue.join()
+
+    def close(self):
+
+        if self.enabled:
+            self.queue.put(None)
+            self.thread.join()
+
+    def frequent_matches(self, profile, start_date, end_date, min_days):
+
+        """
+        Return [(ticker, days)] for tickers matching profile on more than min_days
+        distinct screening dates between start_date and end_date.
+        """
+
+        self.flush()
+
+        conn = sqlite3.connect(self.path)
+
+        try:
+            return conn.execute("""SELECT ticker, COUNT(DISTINCT screening_date) AS days FROM results
+                                   WHERE profile = ? AND screening_date BETWEEN ? AND ?
+                                   GROUP BY ticker HAVING days > ? ORDER BY days DESC, ticker""",
+                                (profile, start_date.isoformat(), end_date.isoformat(), min_days)).fetchall()
+        
+        finally:
+            conn.close()
+
 class StockScreenerApp:
 
 # region : Setup functions
@@ -50,12 +379,21 @@ class StockScreenerApp:
         self.tickers = []
         self.ticker_vars = {}
 
-        self.ohlc_data = {}
+        self.ohlc_data = BarArena()
+        self.day1_cache = {}
+        self.warmup_date = None
+        self.warmup_queue = []
+        self.warmup_running = False
         self.conditions = {}
+        self.condition_labels = {}
 
         self.results = []  
+        self.archive = ResultsArchive()
+
         self.create_widgets()
         self.setup_conditions()
+        self.schedule_warmup()
+        self.catch_up_warmup()
     
     def create_widgets(self):
 
@@ -89,6 +427,32 @@ class StockScreenerApp:
         ttk.Button(btn_frame, text="Run Screener", command=self.run_screener).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5)
 
+        profile_frame = ttk.Frame(control_frame)
+        profile_frame.grid(row=3, column=0, columnspan=2, pady=5)
+
+        ttk.Button(profile_frame, text="Save Profile", command=self.save_profile).pack(side=tk.LEFT, padx=5)
+        ttk.Button(profile_frame, text="Run Profiles", command=self.run_profiles).pack(side=tk.LEFT, padx=5)
+        ttk.Button(profile_frame, text="Frequent Matches", command=self.open_archive_query).pack(side=tk.LEFT, padx=5)
+
+        ratio_frame = ttk.LabelFrame(control_frame, text="Ratio thresholds", padding=5)
+        ratio_frame.grid(row=4, column=0, columnspan=2, pady=5, sticky=tk.W)
+
+        self.ratio_entries = {}
+
+        for col, (cid, multiplier) in enumerate(RATIO_THRESHOLDS.items()):
+
+            ttk.Label(ratio_frame, text=f"{cid}:").grid(row=0, column=2 * col, sticky=tk.W)
+
+            entry = ttk.Entry(ratio_frame, width=5)
+            entry.grid(row=0, column=2 * col + 1, sticky=tk.W, padx=(2, 8))
+            entry.insert(0, f"{multiplier:g}")
+
+            entry.configure(validate="key", validatecommand=(self.root.register(self.make_ratio_label_updater(cid)), "%P"))
+
+            self.ratio_entries[cid] = entry
+
+        ttk.Button(ratio_frame, text="Threshold Sweep", command=self.run_threshold_sweep).grid(row=1, column=0, columnspan=6, pady=(5, 0))
+
         #
         # Results Frame (row=1, col=0) => directly below the Controls
         #
@@ -164,8 +528,8 @@ class StockScreenerApp:
                     (106, "First bar = 8h"), (107, "First bar = 9h"), (108, "Open 16h = Low 16h"), (109, "Open 17h = Low 17h"), (110, "Open 18h = Low 18h"),
                     (111, "Open 19h = Low 19h"), (112, "Open 16h = High 16h"), (113, "Open 17h = High 17h"), (114, "Open 18h = High 18h"), (115, "Open 19h = High 19h"),
                     (116, "Close 16h = Low 16h"), (117, "Close 17h = Low 17h"), (118, "Close 18h = Low 18h"), (119, "Close 19h = Low 19h"), (120, "Close 16h = High 16h"), 
-                    (121, "Close 17h = High 17h"), (122, "Close 18h = High 18h"), (123, "Close 19h = High 19h"), (124, "High [16h DAY-1 ; 19h DAY] > 1.5 * Open 16h DAY-1"), (125, "High [16h DAY-1 ; 19h DAY] > 1.7 * Open 16h DAY-1"),
-                    (126, "High [4h DAY ; 19h DAY] > 2 * Close 19h DAY-1")]
+                    (121, "Close 17h = High 17h"), (122, "Close 18h = High 18h"), (123, "Close 19h = High 19h"), (124, RATIO_LABELS[124].format(f"{RATIO_THRESHOLDS[124]:g}")), (125, RATIO_LABELS[125].format(f"{RATIO_THRESHOLDS[125]:g}")),
+                    (126, RATIO_LABELS[126].format(f"{RATIO_THRESHOLDS[126]:g}"))]
 
         notebook = ttk.Notebook(self.cond_scrollable)
         notebook.pack(fill=tk.BOTH, expand=True)
@@ -203,6 +567,8 @@ class StockScreenerApp:
                     lbl = ttk.Label(block_frame, text=f"{idx}. {label}", anchor="w", style="Large.TLabel")
                     lbl.grid(row=row, column=0, sticky="w")
 
+                    self.condition_labels[idx] = lbl
+
                     # ✔️ Label
                     tick_icon = ttk.Label(block_frame, text=f"{comparator}")
                     tick_icon.grid(row=row, column=1, sticky="e", padx=(5, 2))
@@ -252,7 +618,7 @@ class StockScreenerApp:
         self.tickers = []
 
         self.ticker_vars = {}
-        self.ohlc_data = {}
+        self.ohlc_data = BarArena()
         self.results = []
 
         self.tree.delete(*self.tree.get_children())
@@ -260,6 +626,10 @@ class StockScreenerApp:
         for var in self.conditions.values():
             var.set(False)
 
+        for cid, entry in self.ratio_entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, f"{RATIO_THRESHOLDS[cid]:g}")
+
         for widget in self.ticker_inner_frame.winfo_children():
             widget.destroy()
 
@@ -287,23 +657,114 @@ class StockScreenerApp:
 
                 logger.info(f"Tickers loaded: {', '.join(tickers)}")
                 self.populate_ticker_selection()
+                self.catch_up_warmup()
 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file: {e}")
                 logger.error(f"Error loading file: {e}")
  
-    def save_results(self):
+    def new_run_id(self):
+
+        return f"{datetime.datetime.now(eastern).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def archive_match(self, run_id, screening_date, profile, selection, thresholds, ticker, data, day1):
+
+        ticker_no = self.tickers.index(ticker) + 1 if ticker in self.tickers else 0
+
+        ratio_features = self.compute_ratio_features(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+        max_high_16h_to_19h = ratio_features["open16h"][0] if ratio_features["open16h"] is not None else None
+        max_high_day, close_19h = ratio_features["close19h"] or (None, None)
+
+        self.archive.record(run_id, screening_date, profile, selection, thresholds, ticker, ticker_no,
+                            day1["open_16h"], close_19h, max_high_16h_to_19h, max_high_day)
+
+    def open_archive_query(self):
+
+        """
+        Ask for a profile, a date range and N, then list the archived tickers 
+        matching that profile on more than N days of the range.
+        """
+
+        try:
+            end_date = datetime.datetime.strptime(self.date_entry.get(), "%Y-%m-%d").date()
+
+        except ValueError:
+            end_date = datetime.datetime.now(eastern).date()
+
+        window = tk.Toplevel(self.root)
+        window.title("Frequent Matches")
+
+        query_frame = ttk.Frame(window, padding=5)
+        query_frame.grid(row=0, column=0, sticky=tk.NSEW)
+
+        fields = [("profile", "Profile:", MANUAL_PROFILE),
+                  ("start", "From (YYYY-MM-DD):", end_date.replace(day=1).strftime("%Y-%m-%d")),
+                  ("end", "To (YYYY-MM-DD):", end_date.strftime("%Y-%m-%d")),
+                  ("min_days", "More than N days:", "1")]
+
+        entries = {}
+
+        for row, (key, label, default) in enumerate(fields):
+
+            ttk.Label(query_frame, text=label).grid(row=row, column=0, sticky=tk.W)
+
+            entry = ttk.Entry(query_frame, width=14)
+            entry.grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+            entry.insert(0, default)
+
+            entries[key] = entry
+
+        def run_query():
+
+            if self.query_archive(**{key: entry.get() for key, entry in entries.items()}):
+                window.destroy()
+
+        ttk.Button(query_frame, text="Query", command=run_query).grid(row=len(fields), column=0, columnspan=2, pady=5)
 
-        with open("output/screener_results.txt", "w") as f:
+    def query_archive(self, profile, start, end, min_days):
 
-            f.write("Serial\tTickerNo\tTicker\tOpen16hDay-1\n")
+        try:
+            start_date = datetime.datetime.strptime(start, "%Y-%m-%d").date()
+            end_date = datetime.datetime.strptime(end, "%Y-%m-%d").date()
+            min_days = int(min_days)
+
+        except ValueError:
+            messagebox.showerror("Error", "Invalid query (dates YYYY-MM-DD, N integer)")
+            return False
 
-            for serial, ticker_no, ticker, open_val in sorted(self.results, key=lambda x: x[0]):
-                f.write(f"{serial}\t{ticker_no}\t{ticker}\t{open_val}\n")
+        try:
+            rows = self.archive.frequent_matches(profile.strip(), start_date, end_date, min_days)
+
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to query the results archive: {e}")
+            logger.error(f"Error querying the results archive: {e}")
+            return False
 
-        logger.info("Results saved to screener_results.txt")
+        self.tree.delete(*self.tree.get_children())
+
+        for ticker, days in rows:
+            self.tree.insert("", "end", values=(f"{ticker} - {days} days",))
+
+        logger.info(f"{len(rows)} tickers matched {profile} on more than {min_days} days between {start_date} and {end_date}")
+        return True
+
+    def save_results(self):
+
+        if not self.archive.enabled:
+            logger.warning("Results archive unavailable, results were not saved.")
+            return False
+
+        self.archive.flush()
+        logger.info(f"Results archived to {RESULTS_DB}")
+
+        return True
     
-    def run_screener(self):
+    def prepare_run(self):
+
+        """
+        Clear the results view and the loaded bars, then return (screening date, selected tickers).
+        Return None when the screening date is invalid.
+        """
 
         self.tree.delete(*self.tree.get_children())
 
@@ -312,69 +773,88 @@ class StockScreenerApp:
 
         except ValueError:
             messagebox.showerror("Error", "Invalid date format (YYYY-MM-DD)")
-            return
+            return None
 
-        self.ohlc_data, self.results = {}, []
+        self.ohlc_data = BarArena()
         selected_tickers = [t for t, var in self.ticker_vars.items() if var.get()]
-        logger.info(f"Running screener for date {screening_date} on tickers: {selected_tickers}")
-
-        for ticker in selected_tickers:
-
-            logger.info(f"Fetching data for {ticker}")
-            df = self.fetch_data(ticker, screening_date - datetime.timedelta(days=2), screening_date)
-
-            if df.empty or not isinstance(df.index, pd.DatetimeIndex):
-                logger.warning(f"Data empty or index invalid for {ticker}, skipping.")
-                continue
 
-            self.ohlc_data[ticker] = df
+        return screening_date, selected_tickers
 
-            data_day_minus1 = None
-            day_cursor = screening_date - datetime.timedelta(days=1)
+    def run_screener(self):
 
-            for _ in range(7):  
+        thresholds = self.get_ratio_thresholds()
 
-                temp = df[df.index.date == day_cursor]
+        if thresholds is None:
+            return
 
-                if not temp.empty:
-                    
-                    data_day_minus1 = temp
-                    break
+        run = self.prepare_run()
 
-                day_cursor -= datetime.timedelta(days=1)
+        if run is None:
+            return
 
-            data = df[df.index.date == screening_date]
+        screening_date, selected_tickers = run
+        self.results = []
+        logger.info(f"Running screener for date {screening_date} on tickers: {selected_tickers}")
 
-            if data_day_minus1.empty or data.empty:
-                logger.info(f"No data for {ticker} on screening date or previous day. Skipping ticker.")
-                continue
+        run_id = self.new_run_id()
+        selection = self.selected_conditions()
 
-            open_16h = self.find_previous_16h_open(df, screening_date)
+        for ticker in selected_tickers:
 
-            if open_16h is None:
+            inputs = self.load_screening_inputs(ticker, screening_date)
 
-                logger.info(f"No valid 16:00 bar found for {ticker} within ~7 days before {screening_date}. Skipping ticker.")
+            if inputs is None:
                 continue
 
-            logger.info(f"For {ticker}, Open16hDay-1 is taken as {open_16h}")
+            data, day1 = inputs
 
-            if self.evaluate_conditions(data, open_16h, data_day_minus1):
+            if self.evaluate_conditions(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"], thresholds):
 
                 ticker_no = self.tickers.index(ticker) + 1 if ticker in self.tickers else 0
                 serial = len(self.results) + 1
 
-                self.results.append((serial, ticker_no, ticker, open_16h))
+                self.results.append((serial, ticker_no, ticker, day1["open_16h"]))
+                self.archive_match(run_id, screening_date, MANUAL_PROFILE, selection, thresholds, ticker, data, day1)
 
         for serial, ticker_no, ticker, open_val in self.results:
 
             result_str = f"{serial}. TickerNo:{ticker_no} - {ticker} - Open16h: {open_val}"
             self.tree.insert("", "end", values=(result_str,))
 
-        self.save_results()
-
-        messagebox.showinfo("Success", f"Found {len(self.results)} matches.\nResults saved to screener_results.txt")
+        saved = "Results archived to screener_results.db" if self.save_results() else "Results archive unavailable, results not saved"
+        messagebox.showinfo("Success", f"Found {len(self.results)} matches.\n{saved}")
         logger.info(f"Screener finished with {len(self.results)} matches.")
 
+    def make_ratio_label_updater(self, cid):
+
+        """
+        Keep the label of a ratio condition in sync with its threshold entry.
+        """
+
+        def update(value):
+
+            if cid in self.condition_labels:
+                self.condition_labels[cid].configure(text=f"{cid}. {RATIO_LABELS[cid].format(value.strip() or 'k')}")
+
+            return True
+
+        return update
+
+    def get_ratio_thresholds(self):
+
+        thresholds = {}
+
+        for cid, entry in self.ratio_entries.items():
+
+            try:
+                thresholds[cid] = float(entry.get())
+
+            except ValueError:
+                messagebox.showerror("Error", f"Invalid threshold for condition {cid}: {entry.get()}")
+                return None
+
+        return thresholds
+
     def deselect_all_conditions(self):
 
         for key, var in self.conditions.items():
@@ -389,6 +869,269 @@ class StockScreenerApp:
 
 # endregion
 
+# region : Profile functions
+
+    def selected_conditions(self):
+
+        """
+        Return the ticked conditions as {condition id: inverted}.
+        """
+
+        selection = {}
+
+        for key, var in self.conditions.items():
+
+            if not var.get():
+                continue
+
+            if key.startswith("inv_"):
+                selection[int(key[4:])] = True
+
+            else:
+                selection[int(key)] = False
+
+        return selection
+
+    def save_profile(self):
+
+        selection = self.selected_conditions()
+
+        if not selection:
+            messagebox.showerror("Error", "No condition selected")
+            return
+
+        thresholds = self.get_ratio_thresholds()
+
+        if thresholds is None:
+            return
+
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+        path = filedialog.asksaveasfilename(initialdir=PROFILES_DIR, defaultextension=".json", filetypes=[("Profiles", "*.json")])
+
+        if path:
+
+            name = os.path.splitext(os.path.basename(path))[0]
+
+            if name == MANUAL_PROFILE:
+                messagebox.showerror("Error", f"The profile name {MANUAL_PROFILE} is reserved for checkbox screens")
+                return
+
+            with open(path, "w") as f:
+                json.dump({"name": name,
+                           "conditions": {str(cid): inv for cid, inv in sorted(selection.items())},
+                           "thresholds": {str(cid): val for cid, val in thresholds.items()}}, f, indent=2)
+
+            logger.info(f"Profile {name} saved to {path}")
+
+    def load_profiles(self, paths):
+
+        """
+        Return {name: (selection, thresholds)}. Profiles saved without thresholds use RATIO_THRESHOLDS.
+        A name already taken falls back to the file name, a profile still clashing is rejected.
+        """
+
+        profiles = {}
+
+        for path in paths:
+
+            try:
+                with open(path, "r") as f:
+                    content = json.load(f)
+
+                stem = os.path.splitext(os.path.basename(path))[0]
+                name = content.get("name") or stem
+
+                if name in profiles:
+                    logger.warning(f"Profile name {name} already loaded, using file name {stem} for {path}")
+                    name = stem
+
+                if name in profiles:
+                    raise ValueError(f"duplicate profile name {name}")
+
+                if name == MANUAL_PROFILE:
+                    raise ValueError(f"the profile name {MANUAL_PROFILE} is reserved for checkbox screens")
+
+                profiles[name] = self.parse_profile(content)
+
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load profile {path}: {e}")
+                logger.error(f"Error loading profile {path}: {e}")
+
+        return profiles
+
+    def parse_profile(self, content):
+
+        selection = {}
+
+        for cid, inv in content["conditions"].items():
+
+            if not cid.isdigit() or int(cid) not in CONDITION_IDS:
+                raise ValueError(f"unknown condition {cid}")
+
+            if not isinstance(inv, bool):
+                raise ValueError(f"condition {cid} must be true or false, got {inv!r}")
+
+            selection[int(cid)] = inv
+
+        thresholds = dict(RATIO_THRESHOLDS)
+
+        for cid, val in content.get("thresholds", {}).items():
+
+            if not cid.isdigit() or int(cid) not in RATIO_THRESHOLDS:
+                raise ValueError(f"condition {cid} has no ratio threshold")
+
+            if isinstance(val, bool) or not isinstance(val, (int, float)):
+                raise ValueError(f"threshold of condition {cid} must be a number, got {val!r}")
+
+            thresholds[int(cid)] = float(val)
+
+        return selection, thresholds
+
+    def matches_profile(self, condition_results, selection):
+
+        """
+        A profile matches when every selected condition it can evaluate holds (or fails when inverted).
+        """
+
+        return all(condition_results[cid] != inv for cid, inv in selection.items() if cid in condition_results)
+
+    def run_profiles(self):
+
+        """
+        Evaluate several saved profiles over a single data load.
+        Each condition is computed once per ticker and shared by every profile,
+        only the ratio conditions are re-checked against each profile's thresholds.
+        """
+
+        paths = filedialog.askopenfilenames(initialdir=PROFILES_DIR, filetypes=[("Profiles", "*.json")])
+
+        if not paths:
+            return
+
+        profiles = self.load_profiles(paths)
+
+        if not profiles:
+            return
+
+        run = self.prepare_run()
+
+        if run is None:
+            return
+
+        screening_date, selected_tickers = run
+        logger.info(f"Running profiles {list(profiles)} for date {screening_date} on tickers: {selected_tickers}")
+
+        matrix = {}
+        run_id = self.new_run_id()
+
+        for ticker in selected_tickers:
+
+            inputs = self.load_screening_inputs(ticker, screening_date)
+            matrix[ticker] = {name: False for name in profiles}
+
+            if inputs is None:
+                continue
+
+            data, day1 = inputs
+            condition_results = self.compute_conditions(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+
+            if condition_results is None:
+                continue
+
+            ratio_features = self.compute_ratio_features(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+
+            for name, (selection, thresholds) in profiles.items():
+
+                profile_results = {**condition_results, **self.ratio_conditions(ratio_features, thresholds)}
+                matrix[ticker][name] = self.matches_profile(profile_results, selection)
+
+                if matrix[ticker][name]:
+                    self.archive_match(run_id, screening_date, name, selection, thresholds, ticker, data, day1)
+
+        matrix = pd.DataFrame.from_dict(matrix, orient="index", columns=list(profiles), dtype=bool)
+        matrix.index.name = "Ticker"
+
+        for ticker, row in matrix.iterrows():
+
+            matched = [name for name in matrix.columns if row[name]]
+
+            if matched:
+                self.tree.insert("", "end", values=(f"{ticker} - {', '.join(matched)}",))
+
+        os.makedirs("output", exist_ok=True)
+        matrix.to_csv("output/profile_matrix.csv")
+        self.save_results()
+
+        summary = "\n".join(f"{name}: {int(matrix[name].sum())} matches" for name in matrix.columns)
+        messagebox.showinfo("Success", f"{summary}\nMatrix saved to profile_matrix.csv")
+        logger.info(f"Profiles finished: {summary}")
+
+# endregion
+
+# region : Threshold sweep functions
+
+    def run_threshold_sweep(self):
+
+        """
+        Collect the ratio features of every selected ticker on every session of the 
+        full 7 D window, then count the hits of the whole SWEEP_THRESHOLDS grid at once.
+        The window is always fetched in full, whatever the DAY-1 warm-up holds, so that 
+        the curve only depends on the screening date.
+        """
+
+        run = self.prepare_run()
+
+        if run is None:
+            return
+
+        screening_date, selected_tickers = run
+        logger.info(f"Running threshold sweep up to {screening_date} on tickers: {selected_tickers}")
+
+        samples = {reference: [] for reference in set(RATIO_REFERENCES.values())}
+
+        for ticker in selected_tickers:
+
+            bars = self.fetch_data(ticker, screening_date - datetime.timedelta(days=2), screening_date, duration="7 D")
+
+            if len(bars) == 0:
+                logger.warning(f"Data empty for {ticker}, skipping.")
+                continue
+
+            for session_date in session_dates(bars):
+
+                day1 = self.precompute_day_minus1(ticker, bars, session_date, log_level=logging.DEBUG)
+
+                if day1 is None:
+                    continue
+
+                data = day_bars(bars, session_date)
+                ratio_features = self.compute_ratio_features(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+
+                for reference, feature in ratio_features.items():
+
+                    if feature is not None and None not in feature:
+                        samples[reference].append(feature)
+
+        sweep = pd.DataFrame(index=pd.Index(SWEEP_THRESHOLDS, name="Threshold"))
+
+        for reference in sorted(samples):
+
+            pairs = np.array(samples[reference], dtype=float).reshape(-1, 2)
+
+            sweep[reference] = sweep_ratio_thresholds(pairs[:, 0], pairs[:, 1], SWEEP_THRESHOLDS)
+            sweep[f"{reference}_samples"] = len(pairs)
+
+        for threshold, row in sweep.iterrows():
+            self.tree.insert("", "end", values=(f"x{threshold:g} - " + " - ".join(f"{ref}: {int(row[ref])}/{int(row[f'{ref}_samples'])}" for ref in sorted(samples)),))
+
+        os.makedirs("output", exist_ok=True)
+        sweep.to_csv("output/ratio_sweep.csv")
+
+        messagebox.showinfo("Success", f"Swept {len(SWEEP_THRESHOLDS)} thresholds.\nResults saved to ratio_sweep.csv")
+        logger.info(f"Threshold sweep finished over {', '.join(f'{ref}: {len(samples[ref])} samples' for ref in sorted(samples))}")
+
+# endregion
+
 # region : Ticker functions
      
     def populate_ticker_selection(self):
@@ -421,12 +1164,16 @@ class StockScreenerApp:
 
 # region : Data functions
 
-    def fetch_data(self, ticker, day_minus1, day):
+    def fetch_data(self, ticker, day_minus1, day, duration="7 D", arena=None):
 
         """
         Fetch extended hours data over 7 days to cover weekends/holidays.
+        A shorter duration is used when DAY-1 has already been warmed up.
+        Bars are decoded into arena (self.ohlc_data by default) and the ticker's slice is returned.
         """
 
+        arena = self.ohlc_data if arena is None else arena
+
         try:
             contract = Stock(ticker, "SMART", "USD")
             ib.qualifyContracts(contract)
@@ -439,7 +1186,7 @@ class StockScreenerApp:
             
             bars = ib.reqHistoricalData(contract,
                                         endDateTime=end_time_str,
-                                        durationStr="7 D",
+                                        durationStr=duration,
                                         barSizeSetting="1 hour",
                                         whatToShow="TRADES",
                                         useRTH=False,
@@ -447,74 +1194,247 @@ class StockScreenerApp:
             
             if not bars:
                 logger.warning(f"No data returned for {ticker}")
-                return pd.DataFrame()
+                return np.empty(0, dtype=BAR_DTYPE)
             
-            df = util.df(bars)
-            df["date"] = pd.to_datetime(df["date"])
+            data = arena.add(ticker, bars)
 
-            df.set_index("date", inplace=True)
+            if len(data) == 0:
+                return data
 
-            if df.index.tz is None:
-                df.index = df.index.tz_localize("UTC").tz_convert("US/Eastern")
+            logger.info(f"Data for {ticker} covers {hour_to_datetime(data['Hour'][0])} to {hour_to_datetime(data['Hour'][-1])} ({len(data)} bars)")
 
-            else:
-                df.index = df.index.tz_convert("US/Eastern")
+            with open(f"output/{ticker}_raw_data.csv", "w") as f:
+
+                f.write("date,Open,High,Low,Close\n")
 
-            df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close"}, inplace=True)
-            logger.info(f"Data for {ticker} covers timestamps: {df.index.tolist()}")
-            df.to_csv(f"output/{ticker}_raw_data.csv")
+                for bar in data:
+                    f.write(f"{hour_to_datetime(bar['Hour'])},{to_price(bar['Open'])},{to_price(bar['High'])},{to_price(bar['Low'])},{to_price(bar['Close'])}\n")
 
             logger.info(f"Raw data for {ticker} saved to {ticker}_raw_data.csv")
-            return df
+            return data
         
         except Exception as e:
 
             logger.error(f"Error fetching {ticker}: {e}")
-            return pd.DataFrame()
+            return np.empty(0, dtype=BAR_DTYPE)
 
     def get_default_date(self):
          
         now = datetime.datetime.now(eastern)
 
-        default_date = (now + BDay(1)).date() if now.time() > datetime.time(20, 0) else now.date()
+        default_date = (now + BDay(1)).date() if now.time() > MARKET_CUTOFF else now.date()
         logger.info(f"Default screening date set to: {default_date}")
 
         return default_date
 
-    def evaluate_conditions(self, data, open_16h_day_minus1, data_day_minus1=None):
+    def load_screening_inputs(self, ticker, screening_date):
 
-        results = {}
+        """
+        Return today's bars and the DAY-1 features of a ticker.
+        When DAY-1 was warmed up after the close, only today's bars are fetched.
+        A DAY-1 computed on a full fetch is kept as well once its session is final.
+        """
 
-        def get_bar(df, h):
+        day1 = self.day1_cache.get((ticker, screening_date))
 
-            rtn = df.between_time(f"{int(h):02d}:00", f"{int(h):02d}:59")
+        if day1 is not None:
+            logger.info(f"Using warmed-up DAY-1 data for {ticker}, fetching today's bars only")
+            bars = self.fetch_data(ticker, screening_date - datetime.timedelta(days=2), screening_date, duration="1 D")
+
+        else:
+            logger.info(f"Fetching data for {ticker}")
+            bars = self.fetch_data(ticker, screening_date - datetime.timedelta(days=2), screening_date)
 
-            if rtn.empty:
+        if len(bars) == 0:
+            logger.warning(f"Data empty for {ticker}, skipping.")
+            return None
+
+        if day1 is None:
+            day1 = self.precompute_day_minus1(ticker, bars, screening_date)
+
+            if day1 is None:
                 return None
-            
-            row = rtn.iloc[-1]
-            
-            if isinstance(row, pd.DataFrame):
-                row = row.squeeze()
 
-            return row
+            if self.is_session_final(day1["session_date"]):
+                self.day1_cache[(ticker, screening_date)] = day1
 
-        def get_range_high(df, start_h, end_h):
+        data = day_bars(bars, screening_date)
 
-            bars = [get_bar(df, h) for h in range(start_h, end_h + 1)]
-            highs = [bar["High"] for bar in bars if bar is not None]
-            return max(highs) if highs else None
+        if len(data) == 0:
+            logger.info(f"No data for {ticker} on screening date or previous day. Skipping ticker.")
+            return None
 
-        def get_range_low(df, start_h, end_h):
+        return data, day1
 
-            bars = [get_bar(df, h) for h in range(start_h, end_h + 1)]
-            lows = [bar["Low"] for bar in bars if bar is not None]
-            return min(lows) if lows else None
+    def find_day_minus1(self, bars, screening_date):
 
-        def check(cid, cond):
+        """
+        Return the bars of the last session before screening_date, looking back up to 7 days.
+        """
+
+        day_cursor = screening_date - datetime.timedelta(days=1)
+
+        for _ in range(7):  
 
-            primary = self.conditions.get(str(cid), None)
-            inverse = self.conditions.get(f"inv_{cid}", None)
+            temp = day_bars(bars, day_cursor)
+
+            if len(temp) > 0:
+                return temp
+
+            day_cursor -= datetime.timedelta(days=1)
+
+        return None
+
+    def precompute_day_minus1(self, ticker, bars, screening_date, log_level=logging.INFO):
+
+        """
+        Extract the DAY-1 features read by the conditions : the 16h-19h bars 
+        (18h/19h bars, 16h-19h highs) and the Open 16h DAY-1.
+        """
+
+        data_day_minus1 = self.find_day_minus1(bars, screening_date)
+
+        if data_day_minus1 is None:
+            logger.log(log_level, f"No data for {ticker} on screening date or previous day. Skipping ticker.")
+            return None
+
+        open_16h = self.find_previous_16h_open(bars, screening_date, log_level)
+
+        if open_16h is None:
+            logger.log(log_level, f"No valid 16:00 bar found for {ticker} within ~7 days before {screening_date}. Skipping ticker.")
+            return None
+
+        logger.log(log_level, f"For {ticker}, Open16hDay-1 is taken as {open_16h}")
+
+        evening = hour_bars(data_day_minus1, 16, 19)
+        high_16_19 = to_price(evening["High"].max()) if len(evening) > 0 else None
+
+        return {"session_date": session_dates(data_day_minus1)[0], "data_day_minus1": evening, "open_16h": open_16h, "high_16_19": high_16_19}
+
+    def is_session_final(self, session_date):
+
+        """
+        A session's bars are final once the MARKET_CUTOFF of that day has passed (US/Eastern).
+        """
+
+        return eastern.localize(datetime.datetime.combine(session_date, MARKET_CUTOFF)) <= datetime.datetime.now(eastern)
+
+    def in_warmup_window(self):
+
+        """
+        True between the MARKET_CUTOFF and the start of the next session (US/Eastern).
+        """
+
+        now = datetime.datetime.now(eastern).time()
+        return now > MARKET_CUTOFF or now < SESSION_START
+
+    def schedule_warmup(self):
+
+        """
+        Schedule the DAY-1 warm-up at WARMUP_DELAY after the MARKET_CUTOFF (US/Eastern).
+        """
+
+        now = datetime.datetime.now(eastern)
+        run_day = now.date()
+
+        run_at = eastern.localize(datetime.datetime.combine(run_day, MARKET_CUTOFF)) + WARMUP_DELAY
+
+        if run_at <= now:
+            run_day += datetime.timedelta(days=1)
+            run_at = eastern.localize(datetime.datetime.combine(run_day, MARKET_CUTOFF)) + WARMUP_DELAY
+
+        delay_ms = int((run_at - now).total_seconds() * 1000)
+        self.root.after(delay_ms, self.scheduled_warmup)
+
+        logger.info(f"DAY-1 warm-up scheduled at {run_at.strftime('%Y-%m-%d %H:%M')}")
+
+    def scheduled_warmup(self):
+
+        self.warm_up_day_minus1()
+        self.schedule_warmup()
+
+    def catch_up_warmup(self):
+
+        """
+        Warm up right away when the app is started, or tickers are loaded, after the cut-off.
+        """
+
+        if self.in_warmup_window():
+            self.warm_up_day_minus1()
+
+    def warm_up_day_minus1(self):
+
+        """
+        Queue the ticker list for the DAY-1 warm-up of the next screening date, so that 
+        morning screens only fetch today's bars. Tickers are fetched one per Tk after() 
+        step : each reqHistoricalData call still blocks, but the GUI stays responsive 
+        between two fetches.
+        """
+
+        screening_date = self.get_default_date()
+
+        if screening_date != self.warmup_date:
+
+            self.day1_cache = {key: val for key, val in self.day1_cache.items() if key[1] == screening_date}
+            self.warmup_date = screening_date
+            self.warmup_queue = []
+
+        pending = [t for t in self.tickers if (t, screening_date) not in self.day1_cache and t not in self.warmup_queue]
+        self.warmup_queue.extend(pending)
+
+        logger.info(f"Warming up DAY-1 data for {screening_date} on tickers: {pending}")
+
+        if not self.warmup_running and self.warmup_queue:
+            self.warmup_running = True
+            self.root.after(WARMUP_STEP_MS, self.warm_up_next)
+
+    def warm_up_next(self):
+
+        if not self.warmup_queue:
+
+            self.warmup_running = False
+            logger.info(f"DAY-1 warm-up finished with {len(self.day1_cache)} tickers ready.")
+            return
+
+        ticker = self.warmup_queue.pop(0)
+        screening_date = self.warmup_date
+
+        bars = self.fetch_data(ticker, screening_date - datetime.timedelta(days=2), screening_date, arena=BarArena())
+
+        if len(bars) == 0:
+            logger.warning(f"Data empty for {ticker}, skipping warm-up.")
+
+        else:
+            day1 = self.precompute_day_minus1(ticker, bars, screening_date)
+
+            if day1 is not None:
+                self.day1_cache[(ticker, screening_date)] = day1
+
+        self.root.after(WARMUP_STEP_MS, self.warm_up_next)
+
+    def evaluate_conditions(self, data, open_16h_day_minus1, data_day_minus1=None, high_16_19_day_minus1=None, thresholds=None):
+
+        condition_results = self.compute_conditions(data, open_16h_day_minus1, data_day_minus1, high_16_19_day_minus1, thresholds)
+
+        if condition_results is None:
+            return False
+
+        selection = self.selected_conditions()
+        logger.info("Final condition results: %s", {cid: condition_results[cid] != inv for cid, inv in selection.items() if cid in condition_results})
+
+        return self.matches_profile(condition_results, selection)
+
+    def compute_conditions(self, data, open_16h_day_minus1, data_day_minus1=None, high_16_19_day_minus1=None, thresholds=None):
+
+        """
+        Evaluate every condition once, regardless of the ticked boxes.
+        Conditions that cannot be evaluated are left out of the returned dict.
+        """
+
+        results = {}
+        thresholds = thresholds or RATIO_THRESHOLDS
+
+        def check(cid, cond):
 
             try:
                 
@@ -532,11 +1452,7 @@ class StockScreenerApp:
                 logger.error(f"Error evaluating condition {cid}: {e} | cond={cond}")
                 cond_bool = False
 
-            if primary and primary.get():
-                results[cid] = cond_bool
-
-            elif inverse and inverse.get():
-                results[cid] = not cond_bool
+            results[cid] = cond_bool
 
         try:
 
@@ -687,42 +1603,76 @@ class StockScreenerApp:
                 bar = get_bar(data, hour)
                 check(cid, bar is not None and bar["Close"] == bar["High"])
 
-            # Condition 124–125: High from 16h Y-1 to 19h D > x * open_16h_day_minus1
-            if data_day_minus1 is not None and open_16h_day_minus1:
+            # Conditions 124–126: Max high > x * reference price
+            ratio_features = self.compute_ratio_features(data, open_16h_day_minus1, data_day_minus1, high_16_19_day_minus1)
+
+            for cid, cond in self.ratio_conditions(ratio_features, thresholds).items():
+                check(cid, cond)
+
+            return results
 
-                highs = []
+        except Exception as e:
+            
+            logger.error("Error evaluating conditions: %s", e)
+            return None
+        
+    def compute_ratio_features(self, data, open_16h_day_minus1, data_day_minus1=None, high_16_19_day_minus1=None):
+
+        """
+        Return the (max high, reference price) pairs compared by conditions 124–126.
+        A reference is None when its conditions cannot be evaluated.
+        """
 
+        features = {"open16h": None, "close19h": None}
+
+        if data_day_minus1 is None:
+            return features
+
+        # High [16h DAY-1 ; 19h DAY] vs Open 16h DAY-1
+        if open_16h_day_minus1:
+
+            highs = []
+
+            if high_16_19_day_minus1 is not None:
+                highs.append(high_16_19_day_minus1)
+
+            else:
                 for h in range(16, 20):
                     bar = get_bar(data_day_minus1, h)
 
                     if bar is not None:
                         highs.append(bar["High"])
 
-                for h in range(4, 20):
-                    bar = get_bar(data, h)
-                    
-                    if bar is not None:
-                        highs.append(bar["High"])
-                if highs:
-                    max_high = max(highs)
-                    check(124, max_high > 1.5 * open_16h_day_minus1)
-                    check(125, max_high > 1.7 * open_16h_day_minus1)
+            for h in range(4, 20):
+                bar = get_bar(data, h)
+                
+                if bar is not None:
+                    highs.append(bar["High"])
 
-            # Condition 126: High 4h–19h > 2 * Close 19h DAY-1
-            if data_day_minus1 is not None:
-                bar_19_yest = get_bar(data_day_minus1, 19)
-                max_high_today = get_range_high(data, 4, 19)
-                check(126, bar_19_yest is not None and max_high_today is not None and max_high_today > 2 * bar_19_yest["Close"])
+            if highs:
+                features["open16h"] = (max(highs), open_16h_day_minus1)
 
-            logger.info("Final condition results: %s", results)
-            return all(results.values())
+        # High [4h DAY ; 19h DAY] vs Close 19h DAY-1
+        bar_19_yest = get_bar(data_day_minus1, 19)
+        features["close19h"] = (get_range_high(data, 4, 19), bar_19_yest["Close"] if bar_19_yest is not None else None)
 
-        except Exception as e:
-            
-            logger.error("Error evaluating conditions: %s", e)
-            return False
-        
-    def find_previous_16h_open(self, df, screening_date):
+        return features
+
+    def ratio_conditions(self, ratio_features, thresholds):
+
+        results = {}
+
+        for cid, reference in RATIO_REFERENCES.items():
+
+            feature = ratio_features[reference]
+
+            if feature is not None:
+                max_high, ref_price = feature
+                results[cid] = max_high is not None and ref_price is not None and bool(exceeds_ratio(max_high, ref_price, thresholds[cid])[0, 0])
+
+        return results
+
+    def find_previous_16h_open(self, bars, screening_date, log_level=logging.INFO):
 
         """
         Look back from the day before screening_date up to 7 days.
@@ -733,18 +1683,17 @@ class StockScreenerApp:
 
         for _ in range(7):
 
-            day_data = df[df.index.date == day_cursor]
+            day_data = day_bars(bars, day_cursor)
 
-            if not day_data.empty:
+            if len(day_data) > 0:
                
-                candidate_bar = day_data.between_time("16:00", "16:00")
+                latest_bar = get_bar(day_data, 16)
 
-                if not candidate_bar.empty:
+                if latest_bar is not None:
 
-                    latest_bar = candidate_bar.iloc[-1]
                     open_16h = latest_bar["Open"]
 
-                    logger.info(f"Found bar for {day_cursor} at {latest_bar.name.strftime('%H:%M')}, open={open_16h}")
+                    logger.log(log_level, f"Found bar for {day_cursor} at {hour_to_datetime(latest_bar['Hour']).strftime('%H:%M')}, open={open_16h}")
                     return open_16h
                 
             day_cursor -= datetime.timedelta(days=1)
@@ -756,6 +1705,9 @@ class StockScreenerApp:
 
 if __name__ == "__main__":
 
+    ib.connect('127.0.0.1', 7497, clientId=1)
+    logger.info("Connected to IB Gateway/TWS")
+
     root = tk.Tk()
     root.state("zoomed")
     root.attributes("-fullscreen", True)
@@ -0,0 +1,136 @@
+import os
+import sys
+import random
+import datetime
+
+import pandas as pd
+import pytz
+
+from ib_insync import BarData, util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+SCREENING_DATE = datetime.date(2025, 3, 5)
+
+def make_bars(seed, days=7):
+
+    """
+    Hourly extended-hours bars with 2-decimal prices, many of them on exact boundaries.
+    """
+
+    rnd = random.Random(seed)
+    bars = []
+
+    for offset in range(days, -1, -1):
+
+        day = SCREENING_DATE - datetime.timedelta(days=offset)
+
+        if day.weekday() >= 5:
+            continue
+
+        for h in range(4, 20):
+
+            o = rnd.randint(100, 3000) / 100
+            c = rnd.choice([o, rnd.randint(100, 3000) / 100])
+            hi = max(o, c) + rnd.choice([0, rnd.randint(0, 1500) / 100])
+            lo = min(o, c) - rnd.choice([0, rnd.randint(0, 50) / 100])
+
+            dt = main.eastern.localize(datetime.datetime.combine(day, datetime.time(h))).astimezone(pytz.utc)
+            bars.append(BarData(date=dt, open=o, high=round(hi, 2), low=round(lo, 2), close=c, volume=100, average=o, barCount=5))
+
+    return bars
+
+def dataframe_get_bar(df, h):
+
+    rtn = df.between_time(f"{int(h):02d}:00", f"{int(h):02d}:59")
+    return None if rtn.empty else rtn.iloc[-1]
+
+def dataframe_conditions(app, bars, monkeypatch):
+
+    """
+    Conditions computed on the pandas DataFrame built like fetch_data did before the arena.
+    """
+
+    df = util.df(bars)
+    df["date"] = pd.to_datetime(df["date"])
+    df.set_index("date", inplace=True)
+    df.index = df.index.tz_convert("US/Eastern")
+    df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close"}, inplace=True)
+
+    day_cursor = SCREENING_DATE - datetime.timedelta(days=1)
+
+    while df[df.index.date == day_cursor].empty:
+        day_cursor -= datetime.timedelta(days=1)
+
+    data_day_minus1 = df[df.index.date == day_cursor]
+    open_16h = data_day_minus1.between_time("16:00", "16:00").iloc[-1]["Open"]
+
+    monkeypatch.setattr(main, "get_bar", dataframe_get_bar)
+    return app.compute_conditions(df[df.index.date == SCREENING_DATE], open_16h, data_day_minus1)
+
+def arena_conditions(app, bars):
+
+    bars = main.BarArena().add("TEST", bars)
+    day1 = app.precompute_day_minus1("TEST", bars, SCREENING_DATE)
+
+    return app.compute_conditions(main.day_bars(bars, SCREENING_DATE), day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+
+def test_arena_matches_dataframe_on_synthetic_bars(monkeypatch):
+
+    app = main.StockScreenerApp.__new__(main.StockScreenerApp)
+
+    for seed in range(50):
+
+        bars = make_bars(seed)
+        expected = dataframe_conditions(app, bars, monkeypatch)
+        monkeypatch.undo()
+
+        assert arena_conditions(app, bars) == expected
+
+def test_ratio_condition_on_exact_boundary(monkeypatch):
+
+    app = main.StockScreenerApp.__new__(main.StockScreenerApp)
+    bars = make_bars(0)
+
+    for bar in bars:
+
+        local = bar.date.astimezone(main.eastern)
+
+        if local.date() == SCREENING_DATE - datetime.timedelta(days=1) and local.hour == 16:
+            bar.open, bar.high, bar.low, bar.close = 10.28, 10.28, 10.28, 10.28
+
+        elif local.date() == SCREENING_DATE - datetime.timedelta(days=1) and local.hour > 16:
+            bar.open, bar.high, bar.low, bar.close = 10.0, 10.0, 10.0, 10.0
+
+        elif local.date() == SCREENING_DATE:
+            bar.open, bar.high, bar.low, bar.close = 10.0, 15.42 if local.hour == 4 else 10.0, 10.0, 10.0
+
+    expected = dataframe_conditions(app, bars, monkeypatch)
+    monkeypatch.undo()
+
+    assert expected[124] is True
+    assert arena_conditions(app, bars)[124] is True
+
+def test_out_of_range_prices_are_rejected(caplog):
+
+    bars = make_bars(0)
+    bars[3].high = 250000.0
+
+    arena = main.BarArena()
+
+    assert len(arena.add("BIG", bars)) == 0
+    assert "BIG" not in arena
+    assert "limit of the bar arena" in caplog.text
+
+def test_duplicate_ticker_keeps_first_slice(caplog):
+
+    arena = main.BarArena()
+    first = arena.add("TEST", make_bars(0)).copy()
+
+    again = arena.add("TEST", make_bars(1))
+
+    assert (again == first).all()
+    assert arena.size == len(first)
+    assert "already loaded" in caplog.text
@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+def write_profile(path, content):
+
+    with open(path, "w") as f:
+        json.dump(content, f)
+
+    return str(path)
+
+def load(tmp_path, monkeypatch, *contents):
+
+    errors = []
+    monkeypatch.setattr(main.messagebox, "showerror", lambda title, message: errors.append(message))
+
+    app = main.StockScreenerApp.__new__(main.StockScreenerApp)
+    paths = [write_profile(tmp_path / f"profile_{i}.json", content) for i, content in enumerate(contents)]
+
+    return app.load_profiles(paths), errors
+
+def test_duplicate_names_fall_back_to_file_name(tmp_path, monkeypatch):
+
+    profiles, errors = load(tmp_path, monkeypatch,
+                            {"name": "desk", "conditions": {"1": False}},
+                            {"name": "desk", "conditions": {"2": True}, "thresholds": {"124": 1.6}})
+
+    assert not errors
+    assert profiles["desk"] == ({1: False}, main.RATIO_THRESHOLDS)
+    assert profiles["profile_1"] == ({2: True}, {**main.RATIO_THRESHOLDS, 124: 1.6})
+
+def test_invalid_profiles_are_rejected(tmp_path, monkeypatch):
+
+    profiles, errors = load(tmp_path, monkeypatch,
+                            {"name": "string_bool", "conditions": {"1": "false"}},
+                            {"name": "unknown_id", "conditions": {"127": False}},
+                            {"name": "bad_threshold", "conditions": {"1": False}, "thresholds": {"12": 1.5}},
+                            {"name": main.MANUAL_PROFILE, "conditions": {"1": False}})
+
+    assert profiles == {}
+    assert len(errors) == 4
@@ -0,0 +1,77 @@
+import os
+import sys
+import random
+import datetime
+
+import pytz
+
+from ib_insync import BarData
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+SCREENING_DATE = datetime.date(2025, 3, 5)
+
+def make_bars(seed):
+
+    """
+    Two sessions of hourly bars with 2-decimal prices, often on exact ratio boundaries.
+    """
+
+    rnd = random.Random(seed)
+    reference = rnd.randint(100, 3000) / 100
+    bars = []
+
+    for day in (SCREENING_DATE - datetime.timedelta(days=1), SCREENING_DATE):
+
+        for h in range(4, 20):
+
+            price = reference if h == 16 or h == 19 else rnd.randint(100, 3000) / 100
+            high = round(reference * rnd.choice([1.5, 1.7, 2, 1.6]), 2) if rnd.random() < 0.2 else price
+
+            dt = main.eastern.localize(datetime.datetime.combine(day, datetime.time(h))).astimezone(pytz.utc)
+            bars.append(BarData(date=dt, open=price, high=max(price, high), low=price, close=price, volume=100, average=price, barCount=5))
+
+    return bars
+
+def test_sweep_matches_literal_comparison():
+
+    rnd = random.Random(0)
+    pairs = [(15.42, 10.28), (20.56, 10.28), (17.476, 10.28)] + [(rnd.randint(100, 5000) / 100, rnd.randint(100, 3000) / 100) for _ in range(200)]
+
+    hits = main.sweep_ratio_thresholds([high for high, _ in pairs], [ref for _, ref in pairs], main.SWEEP_THRESHOLDS)
+
+    for threshold, count in zip(main.SWEEP_THRESHOLDS, hits):
+        assert count == sum(high > float(threshold) * ref for high, ref in pairs)
+
+def test_sweep_matches_screen_on_synthetic_bars():
+
+    app = main.StockScreenerApp.__new__(main.StockScreenerApp)
+    samples = {"open16h": [], "close19h": []}
+    screened = {threshold: {124: 0, 126: 0} for threshold in main.SWEEP_THRESHOLDS}
+
+    for seed in range(100):
+
+        bars = main.BarArena().add("TEST", make_bars(seed))
+        day1 = app.precompute_day_minus1("TEST", bars, SCREENING_DATE)
+        data = main.day_bars(bars, SCREENING_DATE)
+
+        features = app.compute_ratio_features(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"])
+
+        for reference in samples:
+            samples[reference].append(features[reference])
+
+        for threshold in main.SWEEP_THRESHOLDS:
+
+            results = app.compute_conditions(data, day1["open_16h"], day1["data_day_minus1"], day1["high_16_19"], {cid: float(threshold) for cid in main.RATIO_THRESHOLDS})
+
+            screened[threshold][124] += results[124]
+            screened[threshold][126] += results[126]
+
+    for reference, cid in (("open16h", 124), ("close19h", 126)):
+
+        pairs = samples[reference]
+        hits = main.sweep_ratio_thresholds([high for high, _ in pairs], [ref for _, ref in pairs], main.SWEEP_THRESHOLDS)
+
+        assert [int(count) for count in hits] == [screened[threshold][cid] for threshold in main.SWEEP_THRESHOLDS]
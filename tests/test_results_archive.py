@@ -0,0 +1,89 @@
+import os
+import sys
+import sqlite3
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+def record(archive, run_id, day, profile, ticker):
+
+    archive.record(run_id, datetime.date(2025, 3, day), profile, {1: False, 5: True}, main.RATIO_THRESHOLDS, ticker, 1, 10.28, 9.5, 15.42, 12.0)
+
+def count_rows(path):
+
+    conn = sqlite3.connect(path)
+
+    try:
+        return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    finally:
+        conn.close()
+
+def test_flush_makes_rows_visible(tmp_path):
+
+    path = str(tmp_path / "results.db")
+    archive = main.ResultsArchive(path, batch_size=2)
+
+    for day in range(1, 6):
+        record(archive, f"run{day}", day, "desk", "AAA")
+
+    archive.flush()
+
+    assert count_rows(path) == 5
+
+    conn = sqlite3.connect(path)
+    row = conn.execute("SELECT conditions, max_high_16h_day_minus1_to_19h_day FROM results LIMIT 1").fetchone()
+    conn.close()
+
+    assert row == ("1,inv_5", 15.42)
+    archive.close()
+
+def test_frequent_matches_counts_distinct_days(tmp_path):
+
+    archive = main.ResultsArchive(str(tmp_path / "results.db"))
+
+    for run_id, day in (("r1", 3), ("r2", 3), ("r3", 4), ("r4", 5)):
+        record(archive, run_id, day, "desk", "AAA")
+
+    for day in (3, 4):
+        record(archive, f"b{day}", day, "desk", "BBB")
+
+    for day in (3, 4, 5, 6):
+        record(archive, f"c{day}", day, "other", "CCC")
+
+    record(archive, "late", 20, "desk", "BBB")
+
+    march = (datetime.date(2025, 3, 1), datetime.date(2025, 3, 10))
+
+    assert archive.frequent_matches("desk", *march, 2) == [("AAA", 3)]
+    assert archive.frequent_matches("desk", *march, 1) == [("AAA", 3), ("BBB", 2)]
+    assert archive.frequent_matches("desk", datetime.date(2025, 3, 1), datetime.date(2025, 3, 31), 2) == [("AAA", 3), ("BBB", 3)]
+    assert archive.frequent_matches("other", *march, 3) == [("CCC", 4)]
+
+    archive.close()
+
+def test_close_joins_writer_and_keeps_pending_rows(tmp_path):
+
+    path = str(tmp_path / "results.db")
+    archive = main.ResultsArchive(path)
+
+    for day in range(1, 30):
+        record(archive, "run", day, "desk", "AAA")
+
+    archive.close()
+
+    assert not archive.thread.is_alive()
+    assert not archive.enabled
+    assert count_rows(path) == 29
+
+def test_unavailable_archive_does_not_block(tmp_path):
+
+    archive = main.ResultsArchive(str(tmp_path))
+
+    record(archive, "run", 1, "desk", "AAA")
+    archive.flush()
+    archive.close()
+
+    assert not archive.enabled